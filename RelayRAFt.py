@@ -3,14 +3,20 @@ import tkinter as tk
 from tkinter import filedialog, ttk, scrolledtext, messagebox
 import threading
 import subprocess
+import concurrent.futures
+import queue
+import collections
+import json
 import tempfile
-# import shutil # Keep for potential future use, though tempfile.TemporaryDirectory handles its own cleanup
+import shutil # disk_usage() for the tmpfs free-space check
 import sys # For PyInstaller path detection
+import stat
 import math # For rounding quality values
 
 # --- Core Dependencies Check ---
 try:
     import rawpy
+    import numpy as np # Installed as a dependency of rawpy
 except ImportError:
     messagebox.showerror("Dependency Error", "The 'rawpy' library is not installed.\nPlease install it: pip install rawpy")
     if getattr(sys, 'frozen', False): print("CRITICAL ERROR: rawpy not found. Application cannot start.")
@@ -24,6 +30,12 @@ except ImportError:
     if getattr(sys, 'frozen', False): print("CRITICAL ERROR: Pillow not found. Application cannot start.")
     sys.exit(1)
 
+# --- Optional Dependencies ---
+try:
+    import cv2 # OpenCV's SIMD/multi-threaded resize is used instead of Pillow's when installed
+except ImportError:
+    cv2 = None
+
 # --- Determine Base Paths ---
 if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
     BUNDLED_DATA_PATH = sys._MEIPASS
@@ -36,6 +48,9 @@ else:
     BUNDLED_DATA_PATH = os.getcwd()
     APPLICATION_PATH = os.getcwd()
 
+# Hide the console window of every tool we launch on Windows
+_CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+
 # --- Default Path Configurations ---
 DEFAULT_CJXL_SUBDIR = "cjxl"
 DEFAULT_CJXL_EXE_NAME = "cjxl.exe"
@@ -54,105 +69,386 @@ DEFAULT_OUTPUT_SUBDIR = "output"
 DEFAULT_INPUT_FOLDER_PATH = os.path.normpath(os.path.join(APPLICATION_PATH, DEFAULT_INPUT_SUBDIR))
 DEFAULT_OUTPUT_FOLDER_PATH = os.path.normpath(os.path.join(APPLICATION_PATH, DEFAULT_OUTPUT_SUBDIR))
 
-# Global variables for encoder paths and status, updated by GUI checks
-CJXL_EXECUTABLE_PATH = DEFAULT_CJXL_EXE_PATH
-_CJXL_AVAILABLE = False
-_CJXL_VERSION_INFO = "Not checked"
-
-AVIFENC_EXECUTABLE_PATH = DEFAULT_AVIFENC_EXE_PATH
-_AVIFENC_AVAILABLE = False
-_AVIFENC_VERSION_INFO = "Not checked"
-
-EXIFTOOL_EXECUTABLE_PATH = DEFAULT_EXIFTOOL_EXE_PATH
-_EXIFTOOL_AVAILABLE = False
-_EXIFTOOL_VERSION_INFO = "Not checked"
+# Per-tool executable path and check status. GUI checks update the path; a conversion also
+# marks a tool unavailable if it disappears mid-batch.
+_TOOL_STATE = {
+    "cjxl": {"path": DEFAULT_CJXL_EXE_PATH, "available": False, "version_info": "Not checked"},
+    "avifenc": {"path": DEFAULT_AVIFENC_EXE_PATH, "available": False, "version_info": "Not checked"},
+    "exiftool": {"path": DEFAULT_EXIFTOOL_EXE_PATH, "available": False, "version_info": "Not checked"},
+}
+
+# Successful probes: (tool type, normcased path, mtime, size) -> (available, version info).
+# A replaced executable gets a new mtime/size and thus a fresh probe. Failures aren't kept, so
+# a tool that was broken or blocked (missing DLL, permissions) is retried on the next check.
+_ENCODER_CHECK_CACHE = {}
+# Successful probes are kept across launches, so an unchanged setup starts without running the tools
+_ENCODER_CHECK_CACHE_FILE = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "RelayRAFt", "enc_cache.json")
+
+def load_encoder_check_cache():
+    """Merges probe results saved by an earlier run into _ENCODER_CHECK_CACHE. A missing or unreadable file is ignored."""
+    try:
+        with open(_ENCODER_CHECK_CACHE_FILE, "r", encoding="utf-8") as cache_file:
+            for tool_type, path, mtime, size, available, version_info in json.load(cache_file):
+                _ENCODER_CHECK_CACHE[(tool_type, path, mtime, size)] = (available, version_info)
+    except (OSError, ValueError, TypeError):
+        pass
+
+def save_encoder_check_cache():
+    """Writes the probe results in _ENCODER_CHECK_CACHE to disk, replacing the file atomically."""
+    entries = [[*key, available, version_info] for key, (available, version_info) in _ENCODER_CHECK_CACHE.items() if available]
+    try:
+        os.makedirs(os.path.dirname(_ENCODER_CHECK_CACHE_FILE), exist_ok=True)
+        temp_path = _ENCODER_CHECK_CACHE_FILE + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as cache_file: json.dump(entries, cache_file)
+        os.replace(temp_path, _ENCODER_CHECK_CACHE_FILE)
+    except OSError:
+        pass
 
 def check_specific_encoder_availability(encoder_type_to_check):
     """
     Checks availability of a specific encoder or tool (cjxl, avifenc, exiftool).
-    Updates global status vars for that tool.
+    Updates the tool's entry in _TOOL_STATE. A successful result for an
+    unchanged executable is served from _ENCODER_CHECK_CACHE.
     """
-    global _CJXL_AVAILABLE, _CJXL_VERSION_INFO, CJXL_EXECUTABLE_PATH
-    global _AVIFENC_AVAILABLE, _AVIFENC_VERSION_INFO, AVIFENC_EXECUTABLE_PATH
-    global _EXIFTOOL_AVAILABLE, _EXIFTOOL_VERSION_INFO, EXIFTOOL_EXECUTABLE_PATH
-
-    path_to_check = ""
-    exe_display_name = ""
-    version_cmd_args = []
-
-    if encoder_type_to_check == "cjxl":
-        path_to_check = CJXL_EXECUTABLE_PATH
-        exe_display_name = "cjxl.exe"
-        version_cmd_args = [path_to_check, "--version"]
-    elif encoder_type_to_check == "avifenc":
-        path_to_check = AVIFENC_EXECUTABLE_PATH
-        exe_display_name = "avifenc.exe"
-        version_cmd_args = [path_to_check, "--version"]
-    elif encoder_type_to_check == "exiftool":
-        path_to_check = EXIFTOOL_EXECUTABLE_PATH
-        exe_display_name = "exiftool.exe"
-        version_cmd_args = [path_to_check, "-ver"]
-    else:
-        return False # Should not happen
+    tool_state = _TOOL_STATE.get(encoder_type_to_check)
+    if tool_state is None: return False # Should not happen
+    path_to_check = tool_state["path"]
+    version_cmd_args = [path_to_check, "-ver" if encoder_type_to_check == "exiftool" else "--version"]
 
     available_flag = False
     version_info_str = ""
+    not_found_str = f"'{path_to_check}' not found. Ensure it's in the expected location or the path is correctly set."
+
+    # Only existing files are cached; missing paths return early below anyway, and bare names
+    # resolved through PATH have no mtime to notice a change by.
+    # On Windows, CreateProcess appends ".exe" to a path without an extension ("C:\tools\cjxl"),
+    # so that file counts as the executable too.
+    stat_candidates = [path_to_check]
+    if os.name == 'nt' and not os.path.splitext(path_to_check)[1]: stat_candidates.append(path_to_check + ".exe")
+    cache_key = None
+    for candidate_path in stat_candidates:
+        try:
+            path_stat = os.stat(candidate_path)
+            if stat.S_ISREG(path_stat.st_mode):
+                cache_key = (encoder_type_to_check, os.path.normcase(candidate_path), path_stat.st_mtime, path_stat.st_size)
+                break
+        except (OSError, ValueError): pass
+
+    if cache_key in _ENCODER_CHECK_CACHE:
+        available_flag, version_info_str = _ENCODER_CHECK_CACHE[cache_key]
+    # A missing file can't run; skip the process launch. Bare names are left to the PATH lookup.
+    elif os.path.dirname(path_to_check) and cache_key is None:
+        version_info_str = not_found_str
+    else:
+        try:
+            # Captured as bytes and decoded only where needed (stderr is ignored for exiftool)
+            process = subprocess.run(version_cmd_args,
+                                     capture_output=True, check=True,
+                                     creationflags=_CREATION_FLAGS)
+            version_info_str = tool_output_to_text(process.stdout).strip()
+            if encoder_type_to_check != "exiftool" and process.stderr.strip(): # exiftool -ver only outputs version to stdout
+                version_info_str += " | " + tool_output_to_text(process.stderr).strip()
+            available_flag = True
+        except FileNotFoundError:
+            version_info_str = not_found_str
+        except subprocess.CalledProcessError as e:
+            version_info_str = f"Error calling '{' '.join(version_cmd_args)}': {tool_output_to_text(e.stderr).strip() if e.stderr else 'No stderr'}"
+        except Exception as e:
+            version_info_str = f"An unexpected error occurred while checking '{path_to_check}': {e}"
+        if available_flag and cache_key is not None: _ENCODER_CHECK_CACHE[cache_key] = (available_flag, version_info_str)
+
+    tool_state.update(available=available_flag, version_info=version_info_str)
+    return available_flag
 
+# --- Path Attribute Queries ---
+# On Windows, os.stat() opens the path and queries several information classes; the GUI only
+# needs exists/dir/file, which a single GetFileAttributesW call answers.
+if os.name == 'nt':
+    import ctypes
+    _GetFileAttributesW = ctypes.windll.kernel32.GetFileAttributesW
+    _GetFileAttributesW.argtypes = (ctypes.c_wchar_p,)
+    _GetFileAttributesW.restype = ctypes.c_uint32
+_INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+_FILE_ATTRIBUTE_DIRECTORY = 0x10
+
+def path_attributes(path):
+    """
+    Returns (exists, is_dir, is_file) for path from one query: GetFileAttributesW
+    on Windows, a single os.stat() elsewhere.
+    """
+    if not path: return (False, False, False)
+    if os.name == 'nt':
+        attributes = _GetFileAttributesW(path)
+        if attributes == _INVALID_FILE_ATTRIBUTES: return (False, False, False)
+        is_dir = bool(attributes & _FILE_ATTRIBUTE_DIRECTORY)
+        return (True, is_dir, not is_dir)
+    try: st = os.stat(path)
+    except (OSError, ValueError): return (False, False, False)
+    return (True, stat.S_ISDIR(st.st_mode), stat.S_ISREG(st.st_mode))
+
+# --- Output Filename Sanitizing ---
+class _SafeFilenameTable(dict):
+    """
+    str.translate table keeping alphanumerics, space, '_' and '-' and mapping
+    every other character to '_'. Non-ASCII code points are classified on
+    first use and cached, so Unicode names behave like str.isalnum().
+    """
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        mapped = codepoint if char.isalnum() or char in (' ', '_', '-') else ord('_')
+        self[codepoint] = mapped
+        return mapped
+
+SAFE_FILENAME_TABLE = _SafeFilenameTable()
+
+# --- Persistent ExifTool Session ---
+# Tags copied from the source RAF to the output file
+_EXIF_TAG_ARGS = (
+    # Camera-related metadata
+    "-Make", "-Model",
+    "-Artist", "-Copyright",
+    "-DateTimeOriginal", "-CreateDate", "-ModifyDate",
+    "-ISO", "-ExposureTime", "-FNumber",
+    "-FocalLength", "-LensModel", "-LensMake",
+    "-WhiteBalance",
+    # GPS metadata (safe to transfer)
+    "-GPSLatitude", "-GPSLongitude", "-GPSAltitude",
+    "-GPSLatitudeRef", "-GPSLongitudeRef", "-GPSAltitudeRef",
+    "-GPSTimeStamp", "-GPSDateStamp",
+    # Descriptive metadata
+    "-Title", "-Description", "-Keywords", "-Subject",
+    "-Creator", "-Rights",
+)
+# The same tags as a ready-made -stay_open/-@ argument block (one arg per line)
+_EXIF_TAG_BLOCK = "\n".join(_EXIF_TAG_ARGS) + "\n"
+EXIFTOOL_READY_SENTINEL = "{ready}"
+
+def exiftool_environment():
+    """Environment for ExifTool runs: forces a UTF-8 locale for tag values and messages."""
+    env = os.environ.copy()
+    env['LANG'] = 'C.UTF-8'
+    return env
+
+def build_exiftool_batch_args(raf_paths, output_folder, output_extension):
+    """
+    Builds an ExifTool argument file (one arg per line) that copies _EXIF_TAG_ARGS
+    from each RAF in raf_paths to <output_folder>/<RAF name><output_extension>.
+    """
+    # -srcfile names the file to write for each processed RAF; '%' is escaped as it's a format character
+    srcfile_pattern = os.path.join(output_folder.replace("%", "%%"), "%f" + output_extension)
+    args = ["-charset", "filename=utf8", "-tagsFromFile", "@", *_EXIF_TAG_ARGS,
+            "-srcfile", srcfile_pattern, "-m", "-overwrite_original", *raf_paths]
+    return "\n".join(args) + "\n"
+
+def start_exiftool_session():
+    """
+    Starts a single long-lived ExifTool process in -stay_open mode, reading
+    arguments from stdin. Avoids paying Perl startup cost once per file.
+    stderr is merged into stdout so warnings arrive before the {ready} sentinel
+    and a full stderr pipe can never stall the session.
+    """
+    return subprocess.Popen(
+        [_TOOL_STATE["exiftool"]["path"], "-stay_open", "True", "-@", "-"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        creationflags=_CREATION_FLAGS,
+        env=exiftool_environment()
+    )
+
+def exiftool_session_execute(exiftool_process, args_block):
+    """
+    Sends one argument block (one arg per line, each newline-terminated) to a
+    running ExifTool session, followed by -execute, and returns its output
+    lines up to {ready}.
+    """
+    exiftool_process.stdin.write("-charset\nfilename=utf8\n" + args_block + "-execute\n")
+    exiftool_process.stdin.flush()
+
+    output_lines = []
+    while True:
+        line = exiftool_process.stdout.readline()
+        if not line: raise EOFError("ExifTool process closed its output")
+        line = line.rstrip("\r\n")
+        if line.strip() == EXIFTOOL_READY_SENTINEL: break
+        output_lines.append(line)
+    return output_lines
+
+def stop_exiftool_session(exiftool_process):
+    """Asks a -stay_open ExifTool process to exit, killing it if it does not."""
     try:
-        process = subprocess.run(version_cmd_args,
-                                 capture_output=True, text=True, check=True,
-                                 creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0)
-        if encoder_type_to_check == "exiftool": # exiftool -ver only outputs version to stdout
-            version_info_str = process.stdout.strip()
-        else:
-            version_info_str = process.stdout.strip() + ((" | " + process.stderr.strip()) if process.stderr.strip() else "")
-        available_flag = True
-    except FileNotFoundError:
-        version_info_str = f"'{path_to_check}' not found. Ensure it's in the expected location or the path is correctly set."
-    except subprocess.CalledProcessError as e:
-        version_info_str = f"Error calling '{' '.join(version_cmd_args)}': {e.stderr.strip() if e.stderr else 'No stderr'}"
-    except Exception as e:
-        version_info_str = f"An unexpected error occurred while checking '{path_to_check}': {e}"
-
-    if encoder_type_to_check == "cjxl":
-        _CJXL_AVAILABLE = available_flag
-        _CJXL_VERSION_INFO = version_info_str
-    elif encoder_type_to_check == "avifenc":
-        _AVIFENC_AVAILABLE = available_flag
-        _AVIFENC_VERSION_INFO = version_info_str
-    elif encoder_type_to_check == "exiftool":
-        _EXIFTOOL_AVAILABLE = available_flag
-        _EXIFTOOL_VERSION_INFO = version_info_str
-    
-    return available_flag
+        exiftool_process.stdin.write("-stay_open\nFalse\n")
+        exiftool_process.stdin.flush()
+        exiftool_process.stdin.close()
+        exiftool_process.wait(timeout=10)
+    except Exception:
+        exiftool_process.kill()
+
+# Intermediate files are read back once by the encoder and then deleted. On Windows, O_SHORT_LIVED
+# sets FILE_ATTRIBUTE_TEMPORARY so they can stay in the cache instead of being flushed to disk.
+# (O_TEMPORARY isn't usable: it deletes the file on close, before the encoder gets to open it.)
+_INTERMEDIATE_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0) | getattr(os, "O_SHORT_LIVED", 0)
+
+def ram_backed_temp_root(required_bytes=0):
+    """
+    Returns '/dev/shm' when it exists, is writable (tmpfs) and has at least
+    required_bytes free, else None for the OS default temp dir.
+    """
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        try:
+            if shutil.disk_usage("/dev/shm").free >= required_bytes: return "/dev/shm"
+        except OSError: pass
+    return None
+
+def remove_intermediate_file(path):
+    """Deletes an intermediate file, ignoring one that was never written (or is already gone)."""
+    try: os.remove(path)
+    except OSError: pass
+
+def open_intermediate_file(path):
+    """Opens an intermediate file for binary writing with _INTERMEDIATE_OPEN_FLAGS."""
+    return os.fdopen(os.open(path, _INTERMEDIATE_OPEN_FLAGS), "wb")
+
+def open_raw_sequential(path):
+    """
+    Opens a RAF for a single front-to-back read, hinting the OS to read ahead
+    aggressively: O_SEQUENTIAL (FILE_FLAG_SEQUENTIAL_SCAN) on Windows,
+    POSIX_FADV_SEQUENTIAL where posix_fadvise exists.
+    """
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_SEQUENTIAL", 0))
+    if hasattr(os, "posix_fadvise"): os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    return os.fdopen(fd, "rb")
+
+def drop_raw_from_cache(raw_file):
+    """Tells the OS a fully read RAF's pages won't be needed again (each file is read once per batch)."""
+    if hasattr(os, "posix_fadvise"): os.posix_fadvise(raw_file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+def allocate_pam_image(reuse_buffer, width, height):
+    """
+    Returns (bytearray, pixel_offset): a buffer for a width x height 8-bit RGB
+    PAM image with its header already written, and where its pixels start.
+    reuse_buffer is overwritten in place when it already has the right size
+    (same-camera batches), so a new frame-sized buffer isn't allocated per file.
+    """
+    header = b"P7\nWIDTH %d\nHEIGHT %d\nDEPTH 3\nMAXVAL 255\nTUPLTYPE RGB\nENDHDR\n" % (width, height)
+    total_size = len(header) + width * height * 3
+    pam_buffer = reuse_buffer if reuse_buffer is not None and len(reuse_buffer) == total_size else bytearray(total_size)
+    pam_buffer[:len(header)] = header
+    return pam_buffer, len(header)
+
+def write_pam_image(reuse_buffer, width, height, rgb_pixels):
+    """
+    Writes packed 8-bit RGB pixels (bytes or any buffer, e.g. ndarray.data) with
+    a PAM header into a bytearray that can be piped to cjxl's stdin.
+    """
+    pam_buffer, pixel_offset = allocate_pam_image(reuse_buffer, width, height)
+    pam_buffer[pixel_offset:] = rgb_pixels
+    return pam_buffer
+
+def tool_output_to_text(output):
+    """Returns captured tool output as text, whether it was captured as str or bytes."""
+    if isinstance(output, bytes): return output.decode('utf-8', errors='replace')
+    return output or ""
+
+def make_thread_safe_callback(callback, lock):
+    """Wraps a GUI callback so concurrent worker threads invoke it one at a time."""
+    if callback is None: return None
+    def locked_callback(*args, **kwargs):
+        with lock: return callback(*args, **kwargs)
+    return locked_callback
+
+def feed_process_stdin(process, input_bytes):
+    """Writes input_bytes to a process's stdin and closes it (run from a helper thread)."""
+    try: process.stdin.write(input_bytes)
+    except OSError: pass # The tool exited early (e.g. bad arguments); its exit code reports why
+    finally:
+        try: process.stdin.close()
+        except OSError: pass
+
+def run_tool_streaming(cmd, input_bytes, on_output_line):
+    """
+    Runs cmd and passes each line of its merged stdout/stderr to on_output_line
+    as soon as it's printed. input_bytes (if not None) is fed to stdin from a
+    helper thread, so a tool that prints while still reading can't deadlock.
+    Returns the exit code; a missing executable raises FileNotFoundError.
+    """
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE if input_bytes is not None else subprocess.DEVNULL,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, creationflags=_CREATION_FLAGS)
+    feeder = None
+    if input_bytes is not None:
+        feeder = threading.Thread(target=feed_process_stdin, args=(process, input_bytes), daemon=True)
+        feeder.start()
+    try:
+        for raw_line in process.stdout:
+            on_output_line(tool_output_to_text(raw_line).rstrip("\r\n"))
+    finally:
+        process.stdout.close()
+        # The feeder must be done with input_bytes before the caller reuses the buffer
+        if feeder is not None: feeder.join()
+        return_code = process.wait()
+    return return_code
+
+# --- Incremental Conversion Cache ---
+# Sidecar in the output folder: normcased output name -> [RAF mtime, RAF size, output mtime],
+# recorded after each conversion. An existing output is still skipped as before, unless this
+# tool wrote it (output mtime unchanged) and its RAF has changed since, in which case it is redone.
+INCREMENTAL_CACHE_FILENAME = ".relayraft_cache.json"
+
+def load_incremental_cache(output_folder):
+    """Returns the output folder's conversion records, or {} if there are none (or they're unreadable)."""
+    try:
+        with open(os.path.join(output_folder, INCREMENTAL_CACHE_FILENAME), "r", encoding="utf-8") as cache_file:
+            entries = json.load(cache_file)
+        return entries if isinstance(entries, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_incremental_cache(output_folder, entries):
+    """Writes the conversion records back to the output folder's sidecar, replacing it atomically."""
+    cache_path = os.path.join(output_folder, INCREMENTAL_CACHE_FILENAME)
+    with open(cache_path + ".tmp", "w", encoding="utf-8") as cache_file: json.dump(entries, cache_file)
+    os.replace(cache_path + ".tmp", cache_path)
 
 # --- Core Conversion Logic ---
+FRAME_PREFETCH_LIMIT = 2 # Decoded frames allowed to wait for a free encoder
+# A full-resolution LibRaw decode holds several hundred MB. Decoding is much faster than encoding,
+# so a couple of decoders keep the encoders fed; more would only add frames held in memory.
+MAX_DECODE_WORKERS = 2
+# Encoded files per ExifTool batch run and conversion-record save. Closing the window mid-batch
+# kills the conversion thread, so at most this many finished outputs can be left without tags.
+METADATA_FLUSH_INTERVAL = 16
+# zlib level for the intermediate PNG (AVIF only). Each PNG is deleted as soon as avifenc has
+# encoded it, so only a few frames' worth of (2-3x larger) uncompressed files exist at a time;
+# set to e.g. 6 when debugging to keep inspectable temp files small.
+INTERMEDIATE_PNG_COMPRESS_LEVEL = 0
+
 def convert_raw_files_core(source_folder, output_folder, 
                            quality_value, lossless_mode, 
                            progress_callback, status_callback,
                            resolution_scale, copy_metadata, output_format_str):
-    global _CJXL_AVAILABLE, _CJXL_VERSION_INFO, CJXL_EXECUTABLE_PATH
-    global _AVIFENC_AVAILABLE, _AVIFENC_VERSION_INFO, AVIFENC_EXECUTABLE_PATH
-    global _EXIFTOOL_AVAILABLE, _EXIFTOOL_VERSION_INFO, EXIFTOOL_EXECUTABLE_PATH
-
     output_format_upper = output_format_str.upper()
     output_extension = ""
     current_encoder_path = ""
     encoder_name_for_log = ""
 
     if output_format_upper == "JXL":
-        if not _CJXL_AVAILABLE:
-            if status_callback: status_callback(f"Error: cjxl.exe is not available or not working. Last status: {_CJXL_VERSION_INFO}", error=True)
+        if not _TOOL_STATE["cjxl"]["available"]:
+            if status_callback: status_callback(f"Error: cjxl.exe is not available or not working. Last status: {_TOOL_STATE['cjxl']['version_info']}", error=True)
             return
         output_extension = ".jxl"
-        current_encoder_path = CJXL_EXECUTABLE_PATH
+        current_encoder_path = _TOOL_STATE["cjxl"]["path"]
         encoder_name_for_log = "cjxl.exe"
     elif output_format_upper == "AVIF":
-        if not _AVIFENC_AVAILABLE:
-            if status_callback: status_callback(f"Error: avifenc.exe is not available or not working. Last status: {_AVIFENC_VERSION_INFO}", error=True)
+        if not _TOOL_STATE["avifenc"]["available"]:
+            if status_callback: status_callback(f"Error: avifenc.exe is not available or not working. Last status: {_TOOL_STATE['avifenc']['version_info']}", error=True)
             return
         output_extension = ".avif"
-        current_encoder_path = AVIFENC_EXECUTABLE_PATH
+        current_encoder_path = _TOOL_STATE["avifenc"]["path"]
         encoder_name_for_log = "avifenc.exe"
     else:
         if status_callback: status_callback(f"Error: Unsupported output format '{output_format_str}'.", error=True)
@@ -171,7 +467,10 @@ def convert_raw_files_core(source_folder, output_folder,
             if status_callback: status_callback(f"Error creating output folder '{output_folder}': {e}", error=True)
             return
 
-    raf_files = [f for f in os.listdir(source_folder) if f.lower().endswith(".raf")]
+    # Name test first: is_file() is free from the directory listing on Windows, but may cost a
+    # stat() elsewhere (symlinks, filesystems without d_type), so only pay that for .raf names.
+    with os.scandir(source_folder) as entries:
+        raf_files = [entry.name for entry in entries if entry.name.lower().endswith(".raf") and entry.is_file()]
     total_files = len(raf_files)
 
     if total_files == 0:
@@ -179,177 +478,425 @@ def convert_raw_files_core(source_folder, output_folder,
         if progress_callback: progress_callback(0, 0)
         return
 
-    temp_dir_obj = tempfile.TemporaryDirectory(prefix="raf2img_")
+    # One listing of the output folder replaces a stat() per file for the "already exists" check.
+    # normcase() keeps the lookup case-insensitive on Windows, matching os.path.exists() there.
+    with os.scandir(output_folder) as entries:
+        existing_outputs = {os.path.normcase(entry.name) for entry in entries}
+    # Different RAF names can sanitize to the same output name ("a!.raf" and "a?.raf", or
+    # "IMG.RAF" and "IMG.raf"); the first one listed claims it and the rest are skipped, so two
+    # encoders never write the same file.
+    planned_outputs = {} # RAF name -> (sanitized base name, RAF that claimed the output name)
+    claimed_outputs = {} # Normcased output name -> RAF that claimed it
+    for filename in raf_files:
+        safe_base_filename = os.path.splitext(filename)[0].translate(SAFE_FILENAME_TABLE).rstrip()
+        output_key = os.path.normcase(safe_base_filename + output_extension)
+        planned_outputs[filename] = (safe_base_filename, claimed_outputs.setdefault(output_key, filename))
+    incremental_cache = load_incremental_cache(output_folder)
+    converted_outputs = [] # (output key, RAF name, RAF path, output path) of files encoded since the last flush
+
+    # Per-file paths are built by plain concatenation; join(folder, "") adds the separator
+    # only where needed, so roots like "C:\" or "/" don't end up with a doubled one.
+    source_prefix = os.path.join(source_folder, "")
+    output_prefix = os.path.join(output_folder, "")
+
+    # Worker threads share these callbacks, so serialize access.
+    callback_lock = threading.Lock()
+    status_callback = make_thread_safe_callback(status_callback, callback_lock)
+    progress_callback = make_thread_safe_callback(progress_callback, callback_lock)
+    stop_batch_event = threading.Event()
+    # PAM buffers handed back by the encode stage once a file is done, reused by later decodes.
+    pam_buffer_pool = queue.SimpleQueue()
+
+    # Metadata is copied in batches of METADATA_FLUSH_INTERVAL files; see flush_finished_files()
+    metadata_jobs = []
+    finished_files_lock = threading.Lock() # Guards metadata_jobs and converted_outputs
+    flush_lock = threading.Lock() # One flush at a time: they share the ExifTool session and argfile
+    exiftool_process = None # Persistent session, started only if per-file copying is needed
+
+    # At half size or smaller, let LibRaw demosaic at half resolution (~4x less work and memory)
+    # and only resize the remainder in Pillow; exactly 0.5 needs no resize at all.
+    use_half_size = resolution_scale <= 0.5
+    resize_scale = resolution_scale * 2 if use_half_size else resolution_scale
+    if use_half_size and status_callback: status_callback(f"Using half-size RAW decoding for resolution scale {resolution_scale:.2f}.")
+
+    # The postprocess settings are the same for every file, so build LibRaw's parameter set once
+    # per batch instead of on every postprocess() call. White balance stays per file (as shot).
+    # MODIFIED: Changed output_bps from 16 to 8 for 24-bit RGB PNG
+    postprocess_params = rawpy.Params(use_camera_wb=True, output_bps=8, half_size=use_half_size,
+                                      output_color=rawpy.ColorSpace.sRGB, no_auto_bright=False)
+
+    # cjxl reads PAM from stdin, so JXL skips the intermediate PNG entirely.
+    # avifenc only accepts Y4M (YCbCr) on stdin, so AVIF keeps the PNG file handoff.
+    use_stdin_pipe = output_format_upper == "JXL"
+
+    # Decoding (rawpy + resize) and encoding run as separate stages joined by a small queue, so
+    # RAWs are demosaiced ahead of the encoders and neither stage waits on the other. The cores
+    # the decode workers don't occupy are split between the concurrent encoders' own threads, so
+    # small batches still use every core and large batches don't oversubscribe the CPU.
+    # Plain threads are enough here: LibRaw, Pillow, OpenCV and the encoder/ExifTool subprocess
+    # waits all release the GIL, and the only file I/O in this process (one sequential RAF read,
+    # plus the AVIF PNG) is small next to the demosaic and encode, so an async event loop would
+    # have nothing to overlap that the two stages don't already.
+    cpu_count = os.cpu_count() or 1
+    max_workers = min(cpu_count, total_files)
+    decode_workers = max(1, min(MAX_DECODE_WORKERS, max_workers // 2))
+    encode_workers = max(1, max_workers - max_workers // 2)
+    encoder_threads = max(1, (cpu_count - decode_workers) // encode_workers)
+
+    # Each intermediate PNG is deleted as soon as its encode is done, so at most one per decode
+    # worker, queued frame and encoder exists at a time. tmpfs is only used if that many fit; an
+    # 8-bit RGB frame is roughly three times the size of its RAF (less when scaled down).
+    temp_root_bytes_needed = 0
+    if not use_stdin_pipe:
+        largest_raf_size = 0
+        for filename in raf_files:
+            try: largest_raf_size = max(largest_raf_size, os.stat(source_prefix + filename).st_size)
+            except OSError: pass
+        frames_in_flight = decode_workers + FRAME_PREFETCH_LIMIT + encode_workers
+        temp_root_bytes_needed = int(frames_in_flight * 3 * largest_raf_size * min(1.0, resolution_scale) ** 2)
+    temp_dir_obj = tempfile.TemporaryDirectory(prefix="raf2img_", dir=ram_backed_temp_root(temp_root_bytes_needed))
     temp_dir = temp_dir_obj.name
-    creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+    temp_prefix = os.path.join(temp_dir, "")
+    # Encoder options are identical for every file; only the input and output paths differ.
+    encoder_option_args = []
+    if output_format_upper == "JXL":
+        if lossless_mode:
+            encoder_option_args.extend(["-d", "0"]) 
+        else:
+            encoder_option_args.extend(["-q", str(quality_value)])
+        encoder_option_args.extend(["--num_threads", str(encoder_threads)])
+    elif output_format_upper == "AVIF":
+        if lossless_mode:
+            encoder_option_args.extend(["-q", "100", "--depth", "10", "--yuv", "444"])
+        else:
+            encoder_option_args.extend(["-q", str(quality_value), "--depth", "10", "--yuv", "444"])
+        encoder_option_args.extend(["-j", str(encoder_threads), "--speed", "6"])
+    encoder_option_args = tuple(encoder_option_args)
+
+    # Bounds how many decoded frames can wait for an encoder. Each decode worker also holds its
+    # finished frame while blocked on put(), so at most decode_workers + FRAME_PREFETCH_LIMIT +
+    # encode_workers frames are in memory at once.
+    frame_queue = queue.Queue(maxsize=FRAME_PREFETCH_LIMIT)
+    if status_callback: status_callback(f"Converting {total_files} file(s) using {decode_workers} decode and {encode_workers} encode thread(s), {encoder_threads} {encoder_name_for_log} thread(s) each.")
+
+    progress_lock = threading.Lock()
+    completed_files = 0
+
+    def mark_file_done():
+        nonlocal completed_files
+        with progress_lock:
+            completed_files += 1
+            if progress_callback: progress_callback(completed_files, total_files)
+
+    def take_pooled_pam_buffer():
+        """Returns a PAM buffer released by the encode stage, or None if none is free yet."""
+        try: return pam_buffer_pool.get_nowait()
+        except queue.Empty: return None
+
+    def decode_one_file(index, filename):
+        """
+        Decode stage: reads and demosaics one RAF and prepares the encoder input.
+        Returns a frame tuple for the encode stage, or None if the file is skipped or failed.
+        """
+        if stop_batch_event.is_set(): return None
+
+        raf_path = source_prefix + filename
+        safe_base_filename, output_claimant = planned_outputs[filename]
+        output_claimed = output_claimant == filename
+        
+        output_filename_with_ext = safe_base_filename + output_extension
+        output_file_full_path = output_prefix + output_filename_with_ext
+        
+        intermediate_png_path = f"{temp_prefix}{index}_{safe_base_filename}_temp.png"
+
+        output_filename_jxl = safe_base_filename + ".jxl" # For checking existence
+        output_filename_avif = safe_base_filename + ".avif" # For checking existence
+
+        skip_processing = False
+        skip_reason = ""
+        if not output_claimed:
+            skip_processing = True; skip_reason = f"Its output name '{output_filename_with_ext}' collides with {output_claimant}, which claimed it first."
+        elif output_format_upper == "JXL" and os.path.normcase(output_filename_jxl) in existing_outputs:
+            skip_processing = True; skip_reason = f"Output file '{output_filename_jxl}' already exists."
+        elif output_format_upper == "AVIF" and os.path.normcase(output_filename_avif) in existing_outputs:
+             skip_processing = True; skip_reason = f"Output file '{output_filename_avif}' already exists."
+
+        # A record only vouches for the RAF it was written from; an output made from another RAF
+        # (or one left by an older record format) is never taken as "this RAF changed".
+        conversion_record = incremental_cache.get(os.path.normcase(output_filename_with_ext))
+        if (skip_processing and output_claimed and isinstance(conversion_record, list) and len(conversion_record) == 4
+                and conversion_record[0] == filename):
+            try:
+                raf_stat, output_stat = os.stat(raf_path), os.stat(output_file_full_path)
+                if output_stat.st_mtime == conversion_record[3] and [raf_stat.st_mtime, raf_stat.st_size] != conversion_record[1:3]:
+                    skip_processing = False
+                    if status_callback: status_callback(f"Re-converting {filename}: the RAF changed since '{output_filename_with_ext}' was created.")
+            except OSError: pass
+        
+        if skip_processing:
+            if status_callback: status_callback(f"Skipping ({index+1}/{total_files}): {filename}. {skip_reason}")
+            return None
 
-    try:
-        for index, filename in enumerate(raf_files):
-            raf_path = os.path.join(source_folder, filename)
-            base_filename = os.path.splitext(filename)[0]
-            safe_base_filename = "".join(c if c.isalnum() or c in (' ', '_', '-') else '_' for c in base_filename).rstrip()
-            
-            output_filename_with_ext = safe_base_filename + output_extension
-            output_file_full_path = os.path.join(output_folder, output_filename_with_ext)
+        if status_callback: status_callback(f"Processing ({index+1}/{total_files}): {filename} -> {output_filename_with_ext}")
+
+        try:
+            if status_callback: status_callback(f"  Reading RAW: {filename}")
+            # rawpy reads the whole file object into memory up front, so its pages can be dropped right away
+            with open_raw_sequential(raf_path) as raf_file, rawpy.imread(raf_file) as raw:
+                drop_raw_from_cache(raf_file)
+                rgb_array = raw.postprocess(postprocess_params)
+            rgb_array = np.ascontiguousarray(rgb_array)
+            pil_image = None # Only created when Pillow actually has work to do
+            encoder_input_bytes = None
             
-            intermediate_png_path = os.path.join(temp_dir, f"{safe_base_filename}_temp.png")
-
-            output_filename_jxl = safe_base_filename + ".jxl" # For checking existence
-            output_file_full_path_jxl = os.path.join(output_folder, output_filename_jxl)
-            output_filename_avif = safe_base_filename + ".avif" # For checking existence
-            output_file_full_path_avif = os.path.join(output_folder, output_filename_avif)
-
-            skip_processing = False
-            skip_reason = ""
-            if output_format_upper == "JXL" and os.path.exists(output_file_full_path_jxl):
-                skip_processing = True; skip_reason = f"Output file '{output_filename_jxl}' already exists."
-            elif output_format_upper == "AVIF" and os.path.exists(output_file_full_path_avif):
-                 skip_processing = True; skip_reason = f"Output file '{output_filename_avif}' already exists."
+            if resize_scale != 1.0:
+                original_height, original_width = rgb_array.shape[:2]
+                new_width = int(original_width * resize_scale)
+                new_height = int(original_height * resize_scale)
+                if new_width > 0 and new_height > 0:
+                    if status_callback: status_callback(f"  Resizing from {original_width}x{original_height} to {new_width}x{new_height} (scale: {resize_scale:.2f})")
+                    if cv2 is not None:
+                        interpolation = cv2.INTER_AREA if resize_scale < 1.0 else cv2.INTER_LANCZOS4
+                        if use_stdin_pipe:
+                            # Resize straight into the PAM buffer's pixel area, so there's no separate resized frame to copy
+                            encoder_input_bytes, pixel_offset = allocate_pam_image(take_pooled_pam_buffer(), new_width, new_height)
+                            pam_pixels = np.frombuffer(encoder_input_bytes, dtype=np.uint8, offset=pixel_offset).reshape(new_height, new_width, 3)
+                            cv2.resize(rgb_array, (new_width, new_height), dst=pam_pixels, interpolation=interpolation)
+                            del pam_pixels
+                        else:
+                            rgb_array = cv2.resize(rgb_array, (new_width, new_height), interpolation=interpolation)
+                    else:
+                        pil_image = Image.fromarray(rgb_array, mode='RGB').resize((new_width, new_height), Image.Resampling.LANCZOS)
+                else:
+                    if status_callback: status_callback(f"  Warning: Invalid new dimensions for {filename}. Original size used.", warning=True)
             
-            if skip_processing:
-                if status_callback: status_callback(f"Skipping ({index+1}/{total_files}): {filename}. {skip_reason}")
-                if progress_callback: progress_callback(index + 1, total_files)
-                continue
+            if use_stdin_pipe:
+                if status_callback: status_callback(f"  Streaming 8-bit RGB to {encoder_name_for_log} via stdin (PAM)")
+                if encoder_input_bytes is None and pil_image is None:
+                    encoder_input_bytes = write_pam_image(take_pooled_pam_buffer(), rgb_array.shape[1], rgb_array.shape[0], rgb_array.data)
+                elif encoder_input_bytes is None:
+                    encoder_input_bytes = write_pam_image(take_pooled_pam_buffer(), pil_image.width, pil_image.height, pil_image.tobytes())
+                del pil_image, rgb_array
+            else:
+                if pil_image is None: pil_image = Image.fromarray(rgb_array, mode='RGB')
+                # MODIFIED: Log message updated to reflect 8-bit PNG
+                if status_callback: status_callback(f"  Saving intermediate 8-bit PNG: {os.path.basename(intermediate_png_path)}")
+                with open_intermediate_file(intermediate_png_path) as intermediate_file:
+                    pil_image.save(intermediate_file, format="PNG", compress_level=INTERMEDIATE_PNG_COMPRESS_LEVEL)
+        except Exception as e:
+            if status_callback: status_callback(f"  Error processing RAW {filename} to PNG: {e}. Skipping.", error=True)
+            if not use_stdin_pipe: remove_intermediate_file(intermediate_png_path) # A partly written PNG
+            return None
+
+        return (index, filename, raf_path, output_filename_with_ext, output_file_full_path, intermediate_png_path, encoder_input_bytes)
+
+    def encode_one_frame(frame):
+        """Encode stage: runs the encoder for one decoded frame and queues its metadata copy."""
 
-            if status_callback: status_callback(f"Processing ({index+1}/{total_files}): {filename} -> {output_filename_with_ext}")
+        index, filename, raf_path, output_filename_with_ext, output_file_full_path, intermediate_png_path, encoder_input_bytes = frame
 
+        encoder_input_arg = "-" if use_stdin_pipe else intermediate_png_path
+        encoder_cmd = [current_encoder_path, encoder_input_arg, output_file_full_path, *encoder_option_args]
+
+        def log_encoder_line(line):
+            # Several encoders may be printing at once, so each line names its file
+            if line.strip() and status_callback: status_callback(f"    {encoder_name_for_log} ({output_filename_with_ext}): {line.strip()}")
+
+        encoding_successful = False
+        try:
+            if status_callback: status_callback(f"  Encoding to {output_format_upper} (Lossless: {lossless_mode}, GUI Quality: {quality_value if not lossless_mode else '100'}): {output_filename_with_ext}")
+            
+            # Encoder output is logged live, line by line, rather than all at once when it exits
+            return_code = run_tool_streaming(encoder_cmd, encoder_input_bytes, log_encoder_line)
+            if return_code != 0: raise subprocess.CalledProcessError(return_code, encoder_cmd)
+            
+            if status_callback: status_callback(f"  Saved {output_format_upper}: {output_file_full_path}")
+            encoding_successful = True
+
+        except FileNotFoundError:
+             if status_callback: status_callback(f"Error: '{current_encoder_path}' not found during conversion. Stopping batch.", error=True)
+             if output_format_upper == "JXL": _TOOL_STATE["cjxl"]["available"] = False
+             elif output_format_upper == "AVIF": _TOOL_STATE["avifenc"]["available"] = False
+             stop_batch_event.set()
+             return
+        except subprocess.CalledProcessError as e:
+            if status_callback:
+                status_callback(f"  Error encoding {output_filename_with_ext} with {encoder_name_for_log}. Skipping.", error=True)
+                status_callback(f"    Command: {' '.join(e.cmd)}", error=True)
+                status_callback(f"    Return Code: {e.returncode} (encoder output is logged above)", error=True)
+        except Exception as e:
+            if status_callback: status_callback(f"  Unexpected error during {output_format_upper} encoding for {filename}: {e}. Skipping.", error=True)
+        finally:
+            if encoder_input_bytes is not None: pam_buffer_pool.put(encoder_input_bytes)
+            encoder_input_bytes = None
+            if not use_stdin_pipe: remove_intermediate_file(intermediate_png_path)
+
+        if not encoding_successful: return
+        with finished_files_lock:
+            converted_outputs.append((os.path.normcase(output_filename_with_ext), filename, raf_path, output_file_full_path))
+            if copy_metadata and _TOOL_STATE["exiftool"]["available"]:
+                metadata_jobs.append((filename, raf_path, output_filename_with_ext, output_file_full_path))
+            flush_due = len(converted_outputs) >= METADATA_FLUSH_INTERVAL
+        if copy_metadata and not _TOOL_STATE["exiftool"]["available"] and status_callback:
+            status_callback(f"    Skipping metadata copy: ExifTool is not available or not configured correctly. Last status: {_TOOL_STATE['exiftool']['version_info']}", warning=True)
+        if flush_due: flush_finished_files()
+
+    def copy_metadata_for_file(filename, raf_path, output_filename_with_ext, output_file_full_path):
+        """Copies metadata from one RAF to its output file through the persistent ExifTool session."""
+        nonlocal exiftool_process
+
+        if not _TOOL_STATE["exiftool"]["available"]: return
+        if exiftool_process is None:
             try:
-                if status_callback: status_callback(f"  Reading RAW: {filename}")
-                with rawpy.imread(raf_path) as raw:
-                    # MODIFIED: Changed output_bps from 16 to 8 for 24-bit RGB PNG
-                    rgb_array = raw.postprocess(use_camera_wb=True, output_bps=8,
-                                                output_color=rawpy.ColorSpace.sRGB, no_auto_bright=False)
-                pil_image = Image.fromarray(rgb_array, mode='RGB')
-                
-                if resolution_scale != 1.0:
-                    original_width, original_height = pil_image.size
-                    new_width = int(original_width * resolution_scale)
-                    new_height = int(original_height * resolution_scale)
-                    if new_width > 0 and new_height > 0:
-                        if status_callback: status_callback(f"  Resizing from {original_width}x{original_height} to {new_width}x{new_height} (scale: {resolution_scale:.2f})")
-                        pil_image = pil_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                exiftool_process = start_exiftool_session()
+                if status_callback: status_callback("Started persistent ExifTool session for metadata copying.")
+            except FileNotFoundError:
+                if status_callback: status_callback(f"Error: '{_TOOL_STATE['exiftool']['path']}' not found during metadata copy. Disabling ExifTool for this session.", error=True)
+                _TOOL_STATE["exiftool"]["available"] = False
+                return
+            except Exception as e_exif_start:
+                if status_callback: status_callback(f"Error starting ExifTool session: {e_exif_start}. Metadata will not be copied.", error=True)
+                _TOOL_STATE["exiftool"]["available"] = False
+                return
+
+        exiftool_args_block = f"-tagsFromFile\n{raf_path}\n{_EXIF_TAG_BLOCK}-m\n-overwrite_original\n{output_file_full_path}\n"
+        try:
+            exif_output_lines = exiftool_session_execute(exiftool_process, exiftool_args_block)
+            exif_had_error = False
+
+            if status_callback:
+                for line in exif_output_lines:
+                    if not line.strip(): continue
+                    if line.startswith("Error"):
+                        exif_had_error = True
+                        status_callback(f"      ExifTool (error): {line.strip()}", error=True)
+                    elif line.startswith("Warning"):
+                        status_callback(f"      ExifTool (stderr/warning): {line.strip()}", warning=True)
+                    elif "image files updated" in line.lower() or "image files created" in line.lower():
+                        status_callback(f"      ExifTool: {line.strip()}")
                     else:
-                        if status_callback: status_callback(f"  Warning: Invalid new dimensions for {filename}. Original size used.", warning=True)
-                
-                # MODIFIED: Log message updated to reflect 8-bit PNG
-                if status_callback: status_callback(f"  Saving intermediate 8-bit PNG: {os.path.basename(intermediate_png_path)}")
-                pil_image.save(intermediate_png_path, format="PNG")
-            except Exception as e:
-                if status_callback: status_callback(f"  Error processing RAW {filename} to PNG: {e}. Skipping.", error=True)
-                if progress_callback: progress_callback(index + 1, total_files)
-                continue 
+                        status_callback(f"      ExifTool (info): {line.strip()}")
 
-            encoder_cmd = [current_encoder_path, intermediate_png_path, output_file_full_path]
-            
-            if output_format_upper == "JXL":
-                if lossless_mode:
-                    encoder_cmd.extend(["-d", "0"]) 
-                else:
-                    encoder_cmd.extend(["-q", str(quality_value)])
-            elif output_format_upper == "AVIF":
-                if lossless_mode:
-                    encoder_cmd.extend(["-q", "100", "--depth", "10", "--yuv", "444"])
+            if status_callback:
+                if exif_had_error:
+                    status_callback(f"    Error copying metadata to {output_filename_with_ext} using ExifTool. File is encoded, but metadata may be missing/original.", error=True)
                 else:
-                    encoder_cmd.extend(["-q", str(quality_value), "--depth", "10", "--yuv", "444"])
-
-            encoding_successful = False
+                    status_callback(f"    Successfully copied safe metadata (including GPS) to {output_filename_with_ext}")
+
+        except (OSError, EOFError) as e_exif:
+            # The persistent ExifTool process died (or its pipes broke); don't try to reuse it.
+            if status_callback: status_callback(f"    ExifTool session ended unexpectedly while processing {output_filename_with_ext}: {e_exif}. Disabling ExifTool for this session.", error=True)
+            stop_exiftool_session(exiftool_process)
+            exiftool_process = None
+            _TOOL_STATE["exiftool"]["available"] = False
+        except Exception as e_exif_other:
+            if status_callback: status_callback(f"    Unexpected error during ExifTool operation for {output_filename_with_ext}: {e_exif_other}", error=True)
+
+    def copy_metadata_batch(jobs):
+        """
+        Copies metadata for the given encoded files with a single ExifTool run (-tagsFromFile @ with
+        -srcfile). Outputs whose name was sanitized can't be addressed as %f, so those go through
+        the persistent session one by one, as do all the jobs if the single run fails.
+        """
+        batch_jobs, single_jobs = [], []
+        for job in jobs:
+            filename, output_filename_with_ext = job[0], job[2]
+            if os.path.splitext(filename)[0] + output_extension == output_filename_with_ext: batch_jobs.append(job)
+            else: single_jobs.append(job)
+
+        if batch_jobs:
+            if status_callback: status_callback(f"Copying metadata for {len(batch_jobs)} file(s) with a single ExifTool run...")
+            # The file list goes through an argument file, so large batches can't exceed the command-line length limit
+            argfile_path = os.path.join(temp_dir, "exiftool_batch_args.txt")
             try:
-                if status_callback: status_callback(f"  Encoding to {output_format_upper} (Lossless: {lossless_mode}, GUI Quality: {quality_value if not lossless_mode else '100'}): {output_filename_with_ext}")
-                
-                process = subprocess.run(encoder_cmd, capture_output=True, text=True, check=True, creationflags=creation_flags)
-                
-                if process.stderr and status_callback:
-                    for line in process.stderr.splitlines():
-                        if line.strip(): status_callback(f"    {encoder_name_for_log}: {line.strip()}")
-                if status_callback: status_callback(f"  Saved {output_format_upper}: {output_file_full_path}")
-                encoding_successful = True
-
+                with open(argfile_path, "w", encoding="utf-8") as argfile:
+                    argfile.write(build_exiftool_batch_args([job[1] for job in batch_jobs], output_folder, output_extension))
+                exif_process = subprocess.run([_TOOL_STATE["exiftool"]["path"], "-@", argfile_path],
+                                              capture_output=True, creationflags=_CREATION_FLAGS, env=exiftool_environment())
+
+                if exif_process.stdout and status_callback:
+                    for line in tool_output_to_text(exif_process.stdout).splitlines():
+                        if line.strip(): status_callback(f"      ExifTool: {line.strip()}")
+                if exif_process.stderr and status_callback:
+                    for line in tool_output_to_text(exif_process.stderr).splitlines():
+                        if line.strip(): status_callback(f"      ExifTool (stderr/warning): {line.strip()}", warning=True)
+
+                if exif_process.returncode == 0:
+                    if status_callback: status_callback(f"    Successfully copied safe metadata (including GPS) to {len(batch_jobs)} file(s)")
+                else:
+                    if status_callback: status_callback(f"    Batch metadata copy failed (return code {exif_process.returncode}). Retrying file by file.", warning=True)
+                    single_jobs = batch_jobs + single_jobs
             except FileNotFoundError:
-                 if status_callback: status_callback(f"Error: '{current_encoder_path}' not found during conversion. Stopping batch.", error=True)
-                 if output_format_upper == "JXL": _CJXL_AVAILABLE = False
-                 elif output_format_upper == "AVIF": _AVIFENC_AVAILABLE = False
-                 return 
-            except subprocess.CalledProcessError as e:
-                if status_callback:
-                    status_callback(f"  Error encoding {output_filename_with_ext} with {encoder_name_for_log}. Skipping.", error=True)
-                    status_callback(f"    Command: {' '.join(e.cmd)}", error=True)
-                    status_callback(f"    Return Code: {e.returncode}", error=True)
-                    status_callback(f"    Stdout: {e.stdout.strip() if e.stdout else ''}", error=True)
-                    status_callback(f"    Stderr: {e.stderr.strip() if e.stderr else ''}", error=True)
+                if status_callback: status_callback(f"Error: '{_TOOL_STATE['exiftool']['path']}' not found during metadata copy. Disabling ExifTool for this session.", error=True)
+                _TOOL_STATE["exiftool"]["available"] = False
+                return
+            except Exception as e_exif_batch:
+                if status_callback: status_callback(f"    Unexpected error during batch ExifTool operation: {e_exif_batch}. Retrying file by file.", warning=True)
+                single_jobs = batch_jobs + single_jobs
+
+        for job in single_jobs:
+            copy_metadata_for_file(*job)
+
+    def decode_worker(index, filename):
+        frame = None
+        try:
+            frame = decode_one_file(index, filename)
+        finally:
+            # Blocks while the prefetch window is full; encoders keep draining the queue even after a stop.
+            if frame is None: mark_file_done()
+            else: frame_queue.put(frame)
+
+    def flush_finished_files():
+        """
+        Copies metadata for the files encoded since the last flush, then saves their
+        conversion records (afterwards, so the recorded output mtime includes the copy).
+        """
+        with flush_lock:
+            with finished_files_lock:
+                jobs, outputs = metadata_jobs[:], converted_outputs[:]
+                metadata_jobs.clear(); converted_outputs.clear()
+            if jobs: copy_metadata_batch(jobs)
+            if not outputs: return
+            for output_key, filename, raf_path, output_file_full_path in outputs:
+                try:
+                    raf_stat, output_stat = os.stat(raf_path), os.stat(output_file_full_path)
+                    incremental_cache[output_key] = [filename, raf_stat.st_mtime, raf_stat.st_size, output_stat.st_mtime]
+                except OSError: incremental_cache.pop(output_key, None)
+            try: save_incremental_cache(output_folder, incremental_cache)
+            except OSError as e_cache:
+                if status_callback: status_callback(f"Could not save conversion records to {INCREMENTAL_CACHE_FILENAME}: {e_cache}", warning=True)
+
+    def encode_worker():
+        while True:
+            frame = frame_queue.get()
+            if frame is None: return # Sentinel: decoding has finished
+            try:
+                if not stop_batch_event.is_set(): encode_one_frame(frame)
+                elif not use_stdin_pipe: remove_intermediate_file(frame[5]) # Dropped after a stop
             except Exception as e:
-                if status_callback: status_callback(f"  Unexpected error during {output_format_upper} encoding for {filename}: {e}. Skipping.", error=True)
-
-            if encoding_successful and copy_metadata:
-                if _EXIFTOOL_AVAILABLE:
-                    exiftool_cmd = [
-                    EXIFTOOL_EXECUTABLE_PATH,
-                    "-tagsFromFile", raf_path,
-                    # Camera-related metadata
-                    "-Make", "-Model",
-                    "-Artist", "-Copyright",
-                    "-DateTimeOriginal", "-CreateDate", "-ModifyDate",
-                    "-ISO", "-ExposureTime", "-FNumber",
-                    "-FocalLength", "-LensModel", "-LensMake",
-                    "-WhiteBalance",
-                    # GPS metadata (safe to transfer)
-                    "-GPSLatitude", "-GPSLongitude", "-GPSAltitude",
-                    "-GPSLatitudeRef", "-GPSLongitudeRef", "-GPSAltitudeRef",
-                    "-GPSTimeStamp", "-GPSDateStamp",
-                    # Descriptive metadata
-                    "-Title", "-Description", "-Keywords", "-Subject",
-                    "-Creator", "-Rights",
-                    # Miscellaneous
-                    "-m", "-overwrite_original",
-                    output_file_full_path
-                ]
+                if status_callback: status_callback(f"  Unexpected worker error: {e}", error=True)
+            finally:
+                mark_file_done()
 
-                try:
-                    env = os.environ.copy()
-                    env['LANG'] = 'C.UTF-8'
-                    exif_process = subprocess.run(
-                        exiftool_cmd,
-                        capture_output=True,
-                        text=True,
-                        check=True,
-                        creationflags=creation_flags,
-                        env=env
-                    )
-
-                    if exif_process.stdout and status_callback:
-                        for line in exif_process.stdout.splitlines():
-                            if line.strip():
-                                if "image files updated" in line.lower() or "image files created" in line.lower():
-                                    status_callback(f"      ExifTool: {line.strip()}")
-                                else:
-                                    status_callback(f"      ExifTool (info): {line.strip()}")
-
-                    if exif_process.stderr and status_callback:
-                        for line in exif_process.stderr.splitlines():
-                            if line.strip():
-                                status_callback(f"      ExifTool (stderr/warning): {line.strip()}", warning=True)
-
-                    if status_callback:
-                        status_callback(f"    Successfully copied safe metadata (including GPS) to {output_filename_with_ext}")
-
-                except subprocess.CalledProcessError as e_exif:
-                    if status_callback:
-                        status_callback(f"    Error copying metadata to {output_filename_with_ext} using ExifTool. File is encoded, but metadata may be missing/original.", error=True)
-                        status_callback(f"      ExifTool Command: {' '.join(e_exif.cmd)}", error=True)
-                        status_callback(f"      Return Code: {e_exif.returncode}", error=True)
-                        status_callback(f"      Stdout: {e_exif.stdout.strip() if e_exif.stdout else ''}", error=True)
-                        status_callback(f"      Stderr: {e_exif.stderr.strip() if e_exif.stderr else ''}", error=True)
-                except FileNotFoundError:
-                    if status_callback: status_callback(f"Error: '{EXIFTOOL_EXECUTABLE_PATH}' not found during metadata copy. Disabling ExifTool for this session.", error=True)
-                    _EXIFTOOL_AVAILABLE = False 
-                except Exception as e_exif_other:
-                    if status_callback: status_callback(f"    Unexpected error during ExifTool operation for {output_filename_with_ext}: {e_exif_other}", error=True)
-                
-            elif status_callback: 
-                status_callback(f"    Skipping metadata copy: ExifTool is not available or not configured correctly. Last status: {_EXIFTOOL_VERSION_INFO}", warning=True)
-
-            if progress_callback:
-                progress_callback(index + 1, total_files)
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=encode_workers) as encode_executor:
+            encode_futures = [encode_executor.submit(encode_worker) for _ in range(encode_workers)]
+            try:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=decode_workers) as decode_executor:
+                    decode_futures = [decode_executor.submit(decode_worker, index, filename) for index, filename in enumerate(raf_files)]
+                    for future in concurrent.futures.as_completed(decode_futures):
+                        if not future.cancelled() and future.exception():
+                            if status_callback: status_callback(f"  Unexpected worker error: {future.exception()}", error=True)
+                        if stop_batch_event.is_set():
+                            for pending in decode_futures: pending.cancel()
+            finally:
+                # Every decode has finished (or was cancelled) by now, so it's safe to release the encoders.
+                for _ in encode_futures: frame_queue.put(None)
+        # Files encoded before a stop still get their metadata (and conversion records)
+        flush_finished_files()
+        if stop_batch_event.is_set(): return
     finally:
+        if exiftool_process: stop_exiftool_session(exiftool_process)
         if status_callback: status_callback(f"Temporary directory {temp_dir} will be cleaned up.")
         temp_dir_obj.cleanup()
 
@@ -357,12 +904,24 @@ def convert_raw_files_core(source_folder, output_folder,
 
 
 # --- GUI Application Logic ---
+UI_PUMP_INTERVAL_MS = 33 # Queued log lines and progress reach the widgets at most ~30 times a second
+LOG_DRAIN_BATCH = 200 # Max lines inserted per flush, so a flood can't stall the event loop
+
+# A tool's GUI widgets and display name; its path and status live in _TOOL_STATE
+_ToolSpec = collections.namedtuple("_ToolSpec", "path_var status_label exe_name")
+
 class RAFConverterApp:
     def __init__(self, root_window):
         self.root = root_window
         self.root.title("RAF Converter (cjxl.exe / avifenc.exe / exiftool.exe)")
         self.root.geometry("750x980") 
 
+        # log_status/update_progress may be called from worker threads; they only record the
+        # update, and _pump_ui applies it to the widgets from the Tk event loop.
+        self._log_queue = queue.SimpleQueue()
+        self._progress_percent = 0
+        self._progress_shown = None
+
         self.source_folder_var = tk.StringVar(value=DEFAULT_INPUT_FOLDER_PATH)
         self.output_folder_var = tk.StringVar(value=DEFAULT_OUTPUT_FOLDER_PATH)
         self.lossless_var = tk.BooleanVar(value=False)
@@ -376,6 +935,12 @@ class RAFConverterApp:
         self.resolution_scale_var = tk.DoubleVar(value=1.0)
         self.copy_metadata_var = tk.BooleanVar(value=True)
 
+        # Plain-attribute mirrors of the option variables, so readers don't go through Tcl.
+        # quality_var isn't mirrored: it's written on every Scale tick and only read at start.
+        self._mirror_var(self.lossless_var, "_lossless")
+        self._mirror_var(self.copy_metadata_var, "_copy_metadata")
+        self._mirror_var(self.output_format_var, "_output_format")
+
         main_frame = ttk.Frame(self.root, padding="20")
         main_frame.pack(expand=True, fill=tk.BOTH)
 
@@ -415,6 +980,12 @@ class RAFConverterApp:
         self.exiftool_status_label.grid(row=1, column=0, columnspan=3, padx=5, pady=(0,5), sticky=tk.W)
         exiftool_frame.columnconfigure(1, weight=1)
 
+        self._tools = {
+            "cjxl": _ToolSpec(self.cjxl_path_var, self.cjxl_status_label, "cjxl.exe"),
+            "avifenc": _ToolSpec(self.avifenc_path_var, self.avifenc_status_label, "avifenc.exe"),
+            "exiftool": _ToolSpec(self.exiftool_path_var, self.exiftool_status_label, "exiftool.exe"),
+        }
+
         folder_frame = ttk.LabelFrame(main_frame, text="Folder Selection", padding="10")
         folder_frame.pack(fill=tk.X, pady=10)
         ttk.Label(folder_frame, text="Source RAF Folder:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
@@ -442,11 +1013,10 @@ class RAFConverterApp:
         quality_frame = ttk.Frame(self.options_frame)
         quality_frame.pack(fill=tk.X, pady=(0,5))
         ttk.Label(quality_frame, text="Quality (1-100, lossy only):").pack(side=tk.LEFT, padx=(0,5), pady=5)
-        self.quality_scale = ttk.Scale(quality_frame, from_=1, to=100, variable=self.quality_var, orient=tk.HORIZONTAL, length=200)
+        self.quality_scale = ttk.Scale(quality_frame, from_=1, to=100, variable=self.quality_var, orient=tk.HORIZONTAL, length=200, command=self._on_quality_change)
         self.quality_scale.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=5, pady=5)
         self.quality_label_val = ttk.Label(quality_frame, text=str(int(self.quality_var.get())), width=4)
         self.quality_label_val.pack(side=tk.LEFT, padx=5, pady=5)
-        self.quality_var.trace_add("write", lambda *args: self.quality_label_val.config(text=str(int(self.quality_var.get()))))
         
         resolution_frame = ttk.Frame(self.options_frame)
         resolution_frame.pack(fill=tk.X, pady=5)
@@ -457,8 +1027,10 @@ class RAFConverterApp:
         self.resolution_scale_val_label.pack(side=tk.LEFT, padx=(0,5), pady=5)
         ttk.Label(resolution_frame, text="(e.g., 0.5, 1.0)").pack(side=tk.LEFT, pady=5)
         
+        # An Entry has no command= hook, so this stays a trace; it parses the typed text directly rather
+        # than via DoubleVar.get(), which raises TclError (not ValueError) on an empty or half-typed value
         def update_resolution_display(*args):
-            try: val = float(self.resolution_scale_var.get()); self.resolution_scale_val_label.config(text=f"{val:.2f}")
+            try: val = float(self.resolution_scale_entry.get()); self.resolution_scale_val_label.config(text=f"{val:.2f}")
             except ValueError: self.resolution_scale_val_label.config(text="---")
         self.resolution_scale_var.trace_add("write", update_resolution_display)
         update_resolution_display()
@@ -485,16 +1057,29 @@ class RAFConverterApp:
         style.configure("Accent.TButton", font=("Arial", 12, "bold"), padding=5)
 
         self.create_default_directories()
-        self.check_tool_path_from_gui("cjxl", initial_check=True)
-        self.check_tool_path_from_gui("avifenc", initial_check=True)
-        self.check_tool_path_from_gui("exiftool", initial_check=True)
+        load_encoder_check_cache()
+        # Each probe launches a process and only touches its own tool's globals, so run them side by side
+        startup_tools = ("cjxl", "avifenc", "exiftool")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(startup_tools)) as probe_executor:
+            list(probe_executor.map(check_specific_encoder_availability, startup_tools))
+        for tool_type in startup_tools: self.check_tool_path_from_gui(tool_type, initial_check=True, probe=False)
         self.toggle_quality_scale() 
         self.update_ui_for_format()
         self._init_complete = True
+        self._pump_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
 
+    def _on_close(self):
+        save_encoder_check_cache()
+        self.root.destroy()
+
+    def _mirror_var(self, var, attr_name):
+        setattr(self, attr_name, var.get())
+        var.trace_add("write", lambda *args: setattr(self, attr_name, var.get()))
 
     def update_ui_for_format(self):
-        selected_format = self.output_format_var.get()
+        selected_format = self._output_format
         self.options_frame.config(text=f"Conversion Options ({selected_format})")
         
         lossless_text = "Lossless Conversion ("
@@ -515,40 +1100,24 @@ class RAFConverterApp:
         else: self.log_status(f"Default input directory already exists: {DEFAULT_INPUT_FOLDER_PATH}", tag="info_tag")
 
 
-    def check_tool_path_from_gui(self, tool_type, initial_check=False):
-        global CJXL_EXECUTABLE_PATH, _CJXL_AVAILABLE, _CJXL_VERSION_INFO
-        global AVIFENC_EXECUTABLE_PATH, _AVIFENC_AVAILABLE, _AVIFENC_VERSION_INFO
-        global EXIFTOOL_EXECUTABLE_PATH, _EXIFTOOL_AVAILABLE, _EXIFTOOL_VERSION_INFO
-
-        path_var, status_label_widget, exe_name_log = (None, None, "")
-        
-        if tool_type == "cjxl":
-            path_var, status_label_widget, exe_name_log = self.cjxl_path_var, self.cjxl_status_label, "cjxl.exe"
-            CJXL_EXECUTABLE_PATH = path_var.get().strip() 
-        elif tool_type == "avifenc":
-            path_var, status_label_widget, exe_name_log = self.avifenc_path_var, self.avifenc_status_label, "avifenc.exe"
-            AVIFENC_EXECUTABLE_PATH = path_var.get().strip()
-        elif tool_type == "exiftool":
-            path_var, status_label_widget, exe_name_log = self.exiftool_path_var, self.exiftool_status_label, "exiftool.exe"
-            EXIFTOOL_EXECUTABLE_PATH = path_var.get().strip()
-        else: return False
-
+    def check_tool_path_from_gui(self, tool_type, initial_check=False, probe=True):
+        tool_spec = self._tools.get(tool_type)
+        if tool_spec is None: return False
+        path_var, status_label_widget, exe_name_log = tool_spec.path_var, tool_spec.status_label, tool_spec.exe_name
+        tool_state = _TOOL_STATE[tool_type]
         user_path = path_var.get().strip()
+        tool_state["path"] = user_path
+
         if not user_path:
             status_msg = f"{exe_name_log} path cannot be empty."
             status_label_widget.config(text=f"Status: {status_msg}", foreground="red")
             if not initial_check: messagebox.showerror(f"{tool_type.upper()} Error", status_msg)
-            if tool_type == "cjxl": _CJXL_AVAILABLE = False
-            elif tool_type == "avifenc": _AVIFENC_AVAILABLE = False
-            elif tool_type == "exiftool": _EXIFTOOL_AVAILABLE = False
+            tool_state["available"] = False
             return False
 
-        check_specific_encoder_availability(tool_type) 
+        if probe: check_specific_encoder_availability(tool_type)
         
-        current_available, current_version_info = (False, "")
-        if tool_type == "cjxl": current_available, current_version_info = _CJXL_AVAILABLE, _CJXL_VERSION_INFO
-        elif tool_type == "avifenc": current_available, current_version_info = _AVIFENC_AVAILABLE, _AVIFENC_VERSION_INFO
-        elif tool_type == "exiftool": current_available, current_version_info = _EXIFTOOL_AVAILABLE, _EXIFTOOL_VERSION_INFO
+        current_available, current_version_info = tool_state["available"], tool_state["version_info"]
         
         if current_available:
             status_label_widget.config(text=f"Status: OK! Version: {current_version_info}", foreground="green")
@@ -561,20 +1130,43 @@ class RAFConverterApp:
         return current_available
 
     def log_status(self, message, error=False, warning=False, tag=None):
-        self.status_text.config(state=tk.NORMAL)
         final_tag = ("error_tag",) if error else ("warning_tag",) if warning else (tag,) if tag else ()
         prefix = "ERROR: " if error else "WARNING: " if warning else ""
-        self.status_text.insert(tk.END, prefix + message + "\n", final_tag)
-        self.status_text.see(tk.END); self.status_text.config(state=tk.DISABLED); self.root.update_idletasks()
+        self._log_queue.put((prefix + message + "\n", final_tag))
+
+    def _pump_ui(self):
+        # One timer covers both widgets; Tk repaints once after it returns, no update_idletasks() needed
+        self._drain_logs()
+        self._apply_progress()
+        self.root.after(UI_PUMP_INTERVAL_MS, self._pump_ui)
+
+    def _drain_logs(self):
+        # Up to LOG_DRAIN_BATCH queued lines go into the widget with one insert (text/tag pairs)
+        insert_args = []
+        while len(insert_args) < 2 * LOG_DRAIN_BATCH:
+            try: text, tags = self._log_queue.get_nowait()
+            except queue.Empty: break
+            insert_args.extend((text, tags))
+        if insert_args:
+            self.status_text.config(state=tk.NORMAL)
+            self.status_text.insert(tk.END, *insert_args)
+            self.status_text.see(tk.END); self.status_text.config(state=tk.DISABLED)
 
     def update_progress(self, current_val, total_val):
-        self.progress_bar["value"] = (current_val / total_val) * 100 if total_val > 0 else 0
-        self.root.update_idletasks()
+        self._progress_percent = (current_val / total_val) * 100 if total_val > 0 else 0
+
+    def _apply_progress(self):
+        if self._progress_percent != self._progress_shown:
+            self._progress_shown = self._progress_percent
+            self.progress_bar["value"] = self._progress_shown
 
     def browse_source_folder(self):
         initial_dir = self.source_folder_var.get()
-        if not os.path.isdir(initial_dir): initial_dir = os.path.dirname(initial_dir)
-        if not os.path.exists(initial_dir): initial_dir = APPLICATION_PATH 
+        initial_exists, initial_is_dir, _ = path_attributes(initial_dir)
+        if not initial_is_dir:
+            initial_dir = os.path.dirname(initial_dir)
+            initial_exists = path_attributes(initial_dir)[0]
+        if not initial_exists: initial_dir = APPLICATION_PATH 
         folder_selected = filedialog.askdirectory(title="Select Source RAF Folder", initialdir=initial_dir)
         if folder_selected:
             self.source_folder_var.set(folder_selected)
@@ -585,50 +1177,74 @@ class RAFConverterApp:
                 self.log_status(f"Output folder automatically set to: {suggested_output}", tag="info_tag")
 
     def browse_output_folder(self):
-        current_output, initial_dir = self.output_folder_var.get(), APPLICATION_PATH
-        if os.path.isdir(current_output): initial_dir = current_output
-        elif os.path.isdir(os.path.dirname(current_output)): initial_dir = os.path.dirname(current_output)
-        elif os.path.isdir(self.source_folder_var.get()): initial_dir = self.source_folder_var.get()
-        if not os.path.exists(initial_dir): initial_dir = os.getcwd() 
+        current_output, source_folder, initial_dir = self.output_folder_var.get(), self.source_folder_var.get(), APPLICATION_PATH
+        # Each candidate is queried at most once, including by the final existence check
+        attributes_by_path = {}
+        def attributes(path):
+            if path not in attributes_by_path: attributes_by_path[path] = path_attributes(path)
+            return attributes_by_path[path]
+        if attributes(current_output)[1]: initial_dir = current_output
+        elif attributes(os.path.dirname(current_output))[1]: initial_dir = os.path.dirname(current_output)
+        elif attributes(source_folder)[1]: initial_dir = source_folder
+        if not attributes(initial_dir)[0]: initial_dir = os.getcwd() 
         folder_selected = filedialog.askdirectory(title="Select Output Folder", initialdir=initial_dir)
         if folder_selected: self.output_folder_var.set(folder_selected); self.log_status(f"Output folder selected: {folder_selected}")
 
+    def _on_quality_change(self, value):
+        # ttk.Scale passes its position as a string, e.g. "57.3"
+        self.quality_label_val.config(text=str(int(float(value))))
+
     def toggle_quality_scale(self):
-        state = tk.DISABLED if self.lossless_var.get() else tk.NORMAL
+        state = tk.DISABLED if self._lossless else tk.NORMAL
         self.quality_scale.config(state=state)
         self.quality_label_val.config(state=state)
 
+    def _validate_inputs(self, source, output):
+        """Returns (error messages, resolution scale, whether the output folder exists), checking everything in one pass."""
+        input_errors, resolution_scale_value = [], None
+        try:
+            resolution_scale_value = float(self.resolution_scale_entry.get())
+            if resolution_scale_value <= 0: input_errors.append("Resolution scale must be positive.")
+        except ValueError: input_errors.append("Invalid resolution scale.")
+
+        if not source or not output:
+            input_errors.append("Select source and output folders.")
+            return input_errors, resolution_scale_value, False
+
+        # Either folder may sit on a slow network share, so both are queried at once
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as check_executor:
+            source_attributes = check_executor.submit(path_attributes, source)
+            output_attributes = check_executor.submit(path_attributes, output)
+        if not source_attributes.result()[1]: input_errors.append(f"Source folder does not exist: {source}")
+        output_exists, output_is_dir, _ = output_attributes.result()
+        if output_exists and not output_is_dir: input_errors.append(f"Output path is a file: {output}")
+        return input_errors, resolution_scale_value, output_exists
+
     def start_conversion_thread(self):
-        selected_format = self.output_format_var.get()
+        selected_format = self._output_format
         encoder_type_to_check = "cjxl" if selected_format == "JXL" else "avifenc"
         
         if not self.check_tool_path_from_gui(encoder_type_to_check): 
              self.log_status(f"{encoder_type_to_check}.exe is not configured correctly. Please check the path and try again.", error=True)
              return
 
-        if self.copy_metadata_var.get() and not _EXIFTOOL_AVAILABLE:
-            self.log_status(f"Metadata copying is enabled, but exiftool.exe is not available or configured. Last status: {_EXIFTOOL_VERSION_INFO}. Metadata will not be copied.", warning=True)
+        if self._copy_metadata and not _TOOL_STATE["exiftool"]["available"]:
+            self.log_status(f"Metadata copying is enabled, but exiftool.exe is not available or configured. Last status: {_TOOL_STATE['exiftool']['version_info']}. Metadata will not be copied.", warning=True)
             
         source, output = self.source_folder_var.get(), self.output_folder_var.get()
-        try:
-            resolution_scale_value = float(self.resolution_scale_var.get())
-            if resolution_scale_value <= 0: messagebox.showerror("Input Error", "Resolution scale must be positive."); return
-        except ValueError: messagebox.showerror("Input Error", "Invalid resolution scale."); return
-        
-        if not source or not output: messagebox.showerror("Input Error", "Select source and output folders."); return
-        if not os.path.isdir(source): messagebox.showerror("Input Error", f"Source folder does not exist: {source}"); return
-        if not os.path.exists(output):
+        input_errors, resolution_scale_value, output_exists = self._validate_inputs(source, output)
+        if input_errors: messagebox.showerror("Input Error", "\n".join(input_errors)); return
+        if not output_exists:
             try: os.makedirs(output); self.log_status(f"Created output folder: {output}")
             except OSError as e: messagebox.showerror("Output Error", f"Could not create output folder: {e}"); return
-        elif not os.path.isdir(output): messagebox.showerror("Output Error", f"Output path is a file: {output}"); return
 
-        self.start_button.config(state=tk.DISABLED); self.progress_bar["value"] = 0
+        self.start_button.config(state=tk.DISABLED); self._progress_percent = 0
         self.log_status(f"Starting conversion to {selected_format} using {encoder_type_to_check}.exe...")
 
         conv_thread = threading.Thread(target=convert_raw_files_core, args=(
-            source, output, int(self.quality_var.get()), self.lossless_var.get(),
+            source, output, int(self.quality_var.get()), self._lossless,
             self.update_progress, self.log_status, resolution_scale_value,
-            self.copy_metadata_var.get(), selected_format), daemon=True)
+            self._copy_metadata, selected_format), daemon=True)
         conv_thread.start()
         self.root.after(100, self.check_conversion_thread, conv_thread)
 